@@ -1,498 +1,1316 @@
-import os
-import sys
-from pathlib import Path
-import yt_dlp
-from moviepy import VideoFileClip, ImageClip, CompositeVideoClip, concatenate_videoclips
-import shutil
-import json
-import re
-from urllib.parse import urlparse
-
-class TikTokVideoProcessor:
-    def __init__(self):
-        self.input_folder = Path("input")
-        self.output_folder = Path("output")
-        self.temp_folder = Path("temp")
-        self.overlay_folder = Path("overlay")
-        
-        # Create folders if they don't exist
-        self.input_folder.mkdir(exist_ok=True)
-        self.output_folder.mkdir(exist_ok=True)
-        self.temp_folder.mkdir(exist_ok=True)
-        self.overlay_folder.mkdir(exist_ok=True)
-        
-    def validate_video_file(self, video_path):
-        """Validate that a video file is not corrupted and can be read"""
-        print(f"Validating video file: {video_path.name}")
-        print(f"File size: {video_path.stat().st_size / (1024*1024):.1f} MB")
-        
-        try:
-            with VideoFileClip(str(video_path)) as test_clip:
-                # Try to read basic properties
-                duration = test_clip.duration
-                fps = test_clip.fps
-                size = test_clip.size
-                
-                print(f"Duration: {duration:.2f} seconds")
-                print(f"FPS: {fps}")
-                print(f"Size: {size[0]}x{size[1]}")
-                
-                # Check if properties are valid
-                if duration <= 0:
-                    print(f"❌ Invalid duration: {duration}")
-                    return False
-                if fps <= 0:
-                    print(f"❌ Invalid FPS: {fps}")
-                    return False
-                if size[0] <= 0 or size[1] <= 0:
-                    print(f"❌ Invalid size: {size}")
-                    return False
-                    
-                # Try to read a frame from the middle
-                try:
-                    test_frame = test_clip.get_frame(duration / 2)
-                    print(f"✓ Successfully read frame from middle of video")
-                except Exception as frame_error:
-                    print(f"❌ Failed to read frame: {frame_error}")
-                    return False
-                
-                print(f"✓ Video validation passed")
-                return True
-                
-        except Exception as e:
-            print(f"❌ Video validation failed for {video_path.name}: {e}")
-            return False
-    
-    def get_overlay_image(self):
-        """Get the overlay image from the overlay folder"""
-        image_extensions = ['.png', '.jpg', '.jpeg', '.gif', '.bmp']
-        
-        for ext in image_extensions:
-            for image_file in self.overlay_folder.glob(f"*{ext}"):
-                return image_file
-        
-        return None
-    
-    def extract_username_from_url(self, url):
-        """Extract username from TikTok profile URL"""
-        # Handle various TikTok URL formats
-        patterns = [
-            r'tiktok\.com/@([^/?]+)',
-            r'tiktok\.com/user/([^/?]+)',
-            r'vm\.tiktok\.com/([^/?]+)',
-            r'tiktok\.com/([^/@?]+)/?$'
-        ]
-        
-        for pattern in patterns:
-            match = re.search(pattern, url)
-            if match:
-                return match.group(1)
-        
-        raise ValueError("Invalid TikTok URL format")
-    
-    def clear_temp_folder(self):
-        """Clear temporary folder before starting"""
-        print("Clearing temporary folder...")
-        try:
-            if self.temp_folder.exists():
-                shutil.rmtree(self.temp_folder)
-            self.temp_folder.mkdir(exist_ok=True)
-        except Exception as e:
-            print(f"Error clearing temp folder: {e}")
-    
-    def download_tiktok_videos(self, profile_url, max_videos=50):
-        """Download TikTok videos from a profile"""
-        print(f"Downloading up to {max_videos} videos from {profile_url}")
-        
-        # Configure yt-dlp options
-        ydl_opts = {
-            'format': 'best[ext=mp4]',
-            'outtmpl': str(self.temp_folder / '%(uploader)s_%(upload_date)s_%(title)s.%(ext)s'),
-            'playlistend': max_videos,
-            'playlistreverse': False,  # Get latest videos first
-            'quiet': False,
-            'no_warnings': False,
-            'extract_flat': False,
-            'ignoreerrors': True,  # Continue if some videos fail
-        }
-        
-        downloaded_files = []
-        
-        try:
-            with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                print("Extracting video information...")
-                # Extract info first to get video URLs
-                info = ydl.extract_info(profile_url, download=False)
-                
-                if 'entries' in info:
-                    # Filter out None entries and limit to max_videos
-                    entries = [entry for entry in info['entries'] if entry is not None][:max_videos]
-                    
-                    print(f"Found {len(entries)} videos to download")
-                    
-                    for i, entry in enumerate(entries):
-                        try:
-                            print(f"Downloading video {i+1}/{len(entries)}: {entry.get('title', 'Unknown')}")
-                            
-                            # Download individual video
-                            video_url = entry['webpage_url']
-                            
-                            # Create a new ydl instance for individual downloads
-                            individual_ydl_opts = {
-                                'format': 'best[ext=mp4]',
-                                'outtmpl': str(self.temp_folder / f'video_{i+1:03d}_%(title)s.%(ext)s'),
-                                'quiet': True,
-                                'no_warnings': True,
-                            }
-                            
-                            with yt_dlp.YoutubeDL(individual_ydl_opts) as individual_ydl:
-                                individual_ydl.download([video_url])
-                            
-                            # Find the downloaded file
-                            downloaded_file = None
-                            for file in self.temp_folder.glob(f"video_{i+1:03d}_*.mp4"):
-                                downloaded_file = file
-                                break
-                            
-                            if downloaded_file and downloaded_file.exists():
-                                # Validate the downloaded video
-                                if self.validate_video_file(downloaded_file):
-                                    downloaded_files.append(downloaded_file)
-                                    print(f"✓ Downloaded: {downloaded_file.name}")
-                                else:
-                                    print(f"✗ Downloaded file appears corrupted: {downloaded_file.name}")
-                                    # Try to delete corrupted file
-                                    try:
-                                        downloaded_file.unlink()
-                                    except:
-                                        pass
-                            else:
-                                print(f"✗ Failed to find downloaded file for video {i+1}")
-                                        
-                        except Exception as e:
-                            print(f"Error downloading video {i+1}: {e}")
-                            continue
-                            
-                else:
-                    print("No videos found in the profile")
-                    
-        except Exception as e:
-            print(f"Error downloading videos: {e}")
-            
-        print(f"Successfully downloaded {len(downloaded_files)} out of {max_videos} requested videos")
-        return downloaded_files
-    
-    def process_video(self, video_path, max_duration=20, add_overlay=True):
-        """Process individual video: cut to max duration and add image overlay if specified"""
-        overlay_clip = None
-        clip = None
-        final_clip = None
-        
-        try:
-            print(f"Processing video: {video_path.name}")
-            
-            # Load video with error handling for corrupted frames
-            clip = VideoFileClip(str(video_path))
-            
-            # Validate the clip duration to avoid frame index issues
-            actual_duration = clip.duration
-            if actual_duration <= 0:
-                print(f"Warning: Video {video_path.name} has invalid duration: {actual_duration}")
-                return None
-            
-            # Cut to maximum duration if needed, but leave a small buffer to avoid frame issues
-            if actual_duration > max_duration:
-                # Use a slightly shorter duration to avoid frame index errors
-                safe_duration = min(max_duration, actual_duration - 0.1)
-                clip = clip.subclip(0, max(safe_duration, 1.0))  # Ensure at least 1 second
-            
-            # Add overlay if specified and overlay image exists
-            if add_overlay:
-                overlay_image_path = self.get_overlay_image()
-                if overlay_image_path:
-                    print(f"Adding overlay: {overlay_image_path.name}")
-                    # Create image overlay
-                    overlay_clip = ImageClip(str(overlay_image_path))
-                    
-                    # Resize overlay to fit video if needed (optional)
-                    if overlay_clip.w > clip.w or overlay_clip.h > clip.h:
-                        overlay_clip = overlay_clip.resize(width=clip.w//1)  # 1/1 of video width
-
-                    # Position overlay at center of video and set duration
-                    overlay_clip = overlay_clip.with_position('center').with_duration(clip.duration)
-                    
-                    # Composite video with overlay
-                    final_clip = CompositeVideoClip([clip, overlay_clip])
-                else:
-                    print("No overlay image found in overlay folder")
-                    final_clip = clip
-            else:
-                final_clip = clip
-            
-            # Save processed video with consistent encoding settings and error handling
-            output_path = self.temp_folder / f"processed_{video_path.name}"
-            
-            # Use more conservative encoding settings to handle problematic videos
-            final_clip.write_videofile(
-                str(output_path), 
-                codec='libx264', 
-                audio_codec='aac',
-                temp_audiofile='temp-audio.m4a',
-                remove_temp=True,
-                fps=30  # Force consistent FPS
-            )
-            
-            return output_path
-            
-        except Exception as e:
-            print(f"Error processing video {video_path.name}: {e}")
-            return None
-        finally:
-            # Proper cleanup of all clips
-            if overlay_clip:
-                overlay_clip.close()
-            if final_clip and final_clip != clip:
-                final_clip.close()
-            if clip:
-                clip.close()
-    
-    def get_input_video(self):
-        """Get the input video from the input folder"""
-        video_extensions = ['.mp4', '.avi', '.mov', '.mkv', '.wmv', '.flv']
-        
-        print("Scanning input folder for video files...")
-        print(f"Input folder path: {self.input_folder.absolute()}")
-        
-        all_files = list(self.input_folder.glob("*"))
-        print(f"Found {len(all_files)} files in input folder:")
-        for file in all_files:
-            print(f"  - {file.name} ({file.stat().st_size / (1024*1024):.1f} MB)")
-        
-        for ext in video_extensions:
-            video_files = list(self.input_folder.glob(f"*{ext}"))
-            if video_files:
-                print(f"Found {len(video_files)} {ext} files:")
-                for video_file in video_files:
-                    print(f"  - {video_file.name}")
-                    return video_file
-        
-        print("❌ No video files found in input folder!")
-        print("Expected file types:", ", ".join(video_extensions))
-        return None
-    
-    def create_video_pairs(self, processed_videos, input_video_path):
-        """Create individual video pairs: each TikTok video + input video"""
-        print("Creating individual video pairs...")
-        
-        if not input_video_path or not input_video_path.exists():
-            print("Input video not found")
-            return []
-        
-        created_pairs = []
-        
-        try:
-            # Load input video once to get its properties
-            input_clip_template = VideoFileClip(str(input_video_path))
-            input_resolution = input_clip_template.size
-            input_fps = input_clip_template.fps
-            print(f"Input video resolution: {input_resolution[0]}x{input_resolution[1]} @ {input_fps} FPS")
-            input_clip_template.close()
-            
-            for i, video_path in enumerate(processed_videos):
-                if video_path and video_path.exists():
-                    try:
-                        print(f"Creating pair {i+1}/{len(processed_videos)}")
-                        
-                        # Load fresh clips for each pair to avoid corruption
-                        tiktok_clip = VideoFileClip(str(video_path))
-                        input_clip = VideoFileClip(str(input_video_path))  # Fresh load each time
-                        
-                        # Display resolution information
-                        tiktok_resolution = tiktok_clip.size
-                        print(f"  TikTok video resolution: {tiktok_resolution[0]}x{tiktok_resolution[1]}")
-                        print(f"  Input video resolution: {input_resolution[0]}x{input_resolution[1]}")
-                        
-                        # Validate clip durations before concatenation
-                        if tiktok_clip.duration <= 0 or input_clip.duration <= 0:
-                            print(f"Warning: Invalid clip duration for pair {i+1}, skipping")
-                            tiktok_clip.close()
-                            input_clip.close()
-                            continue
-                        
-                        # Handle resolution differences
-                        if tiktok_resolution != input_resolution:
-                            print(f"  ⚠️  Resolution mismatch detected!")
-                            print(f"  📐 Scaling TikTok video to fill frame (no black borders)...")
-
-                            target_w, target_h = input_resolution
-                            tiktok_w, tiktok_h = tiktok_resolution
-
-                            # Determine the scaling factor to fill the frame
-                            scale_factor = max(target_w / tiktok_w, target_h / tiktok_h)
-                            new_w = int(tiktok_w * scale_factor)
-                            new_h = int(tiktok_h * scale_factor)
-
-                            print(f"  📏 Scaling from {tiktok_w}x{tiktok_h} to {new_w}x{new_h}")
-
-                            # In MoviePy 2.2.1, we need to use a different approach for resizing
-                            # Use the resize transformation method
-                            tiktok_clip = tiktok_clip.resized((new_w, new_h))
-
-                            # Crop the resized clip from the center if its size doesn't match the target.
-                            if tiktok_clip.size != (target_w, target_h):
-                                print(f"  ✂️  Cropping to exact size {target_w}x{target_h}")
-                                crop_x = (tiktok_clip.w - target_w) // 2
-                                crop_y = (tiktok_clip.h - target_h) // 2
-                                
-                                tiktok_clip = tiktok_clip.crop(x1=crop_x, y1=crop_y, width=target_w, height=target_h)
-
-                            print(f"  ✓ TikTok video scaled to {target_w}x{target_h} (no black borders)")
-                        else:
-                            print(f"  ✓ Resolutions match, no resizing needed")
-                        
-                        # Create pair: TikTok video + input video
-                        # Now both videos should have the same resolution
-                        pair_video = concatenate_videoclips([tiktok_clip, input_clip])
-                        
-                        # Save pair with consistent encoding and better error handling
-                        output_path = self.output_folder / f"video_pair_{i+1:02d}.mp4"
-                        pair_video.write_videofile(
-                            str(output_path), 
-                            codec='libx264', 
-                            audio_codec='aac',
-                            temp_audiofile='temp-audio.m4a',
-                            remove_temp=True,
-                            fps=30  # Force consistent FPS
-                        )
-                        
-                        created_pairs.append(output_path)
-                        print(f"  ✓ Created: {output_path.name}")
-                        
-                        # Clean up clips immediately after use
-                        tiktok_clip.close()
-                        input_clip.close()
-                        pair_video.close()
-                        
-                    except Exception as e:
-                        print(f"Error creating pair {i+1}: {e}")
-                        continue
-            
-            return created_pairs
-            
-        except Exception as e:
-            print(f"Error creating video pairs: {e}")
-            return []
-    
-    def cleanup_temp_files(self):
-        """Clean up temporary files"""
-        print("Cleaning up temporary files...")
-        try:
-            shutil.rmtree(self.temp_folder)
-            self.temp_folder.mkdir(exist_ok=True)
-        except Exception as e:
-            print(f"Error cleaning up temp files: {e}")
-    
-    def run(self):
-        """Main execution function"""
-        print("=== TikTok Video Processor ===")
-        
-        # Clear temp folder to ensure clean start
-        self.clear_temp_folder()
-        
-        # Get input video
-        input_video = self.get_input_video()
-        if not input_video:
-            print("\n❌ No input video found in 'input' folder.")
-            print("\n💡 To fix this:")
-            print("1. Make sure you have a video file in the 'input' folder")
-            print("2. Supported formats: .mp4, .avi, .mov, .mkv, .wmv, .flv")
-            print("3. Try renaming your file to have a proper extension")
-            print("4. Make sure the file isn't corrupted")
-            return
-        
-        print(f"\n✓ Found input video: {input_video.name}")
-        
-        # Validate input video with detailed output
-        print("\n=== Validating Input Video ===")
-        if not self.validate_video_file(input_video):
-            print("\n❌ Input video appears to be corrupted or unreadable.")
-            print("\n💡 To fix this:")
-            print("1. Try re-downloading or re-copying the video file")
-            print("2. Convert the video to MP4 format using a video converter")
-            print("3. Check if the file is completely downloaded (not partial)")
-            print("4. Try a different video file")
-            print("5. Make sure the video isn't DRM-protected")
-            return
-        
-        # Check for overlay image
-        overlay_image = self.get_overlay_image()
-        if overlay_image:
-            print(f"Found overlay image: {overlay_image.name}")
-        else:
-            print("No overlay image found in 'overlay' folder. TikTok videos will have no overlay.")
-        
-        # Get TikTok profile URL
-        profile_url = input("Enter TikTok profile URL: ").strip()
-        if not profile_url:
-            print("No profile URL provided")
-            return
-        
-        # Validate and normalize URL
-        if not any(domain in profile_url for domain in ['tiktok.com', 'vm.tiktok.com']):
-            print("Invalid TikTok URL. Please use a valid TikTok profile URL.")
-            return
-        
-        print(f"Using profile URL: {profile_url}")
-        
-        # Get number of videos to download
-        try:
-            max_videos = int(input("Enter maximum number of videos to download (1-50): "))
-            if max_videos < 1 or max_videos > 50:
-                print("Number must be between 1 and 50")
-                return
-        except ValueError:
-            print("Invalid number format")
-            return
-        
-        # Download TikTok videos
-        downloaded_videos = self.download_tiktok_videos(profile_url, max_videos)
-        
-        if not downloaded_videos:
-            print("No videos were downloaded")
-            return
-        
-        print(f"Downloaded {len(downloaded_videos)} videos")
-        
-        # Process each video (with overlay for TikTok videos)
-        processed_videos = []
-        for video_path in downloaded_videos:
-            # Validate video before processing
-            if self.validate_video_file(video_path):
-                processed_video = self.process_video(video_path, add_overlay=True)
-                if processed_video:
-                    processed_videos.append(processed_video)
-            else:
-                print(f"Skipping corrupted video: {video_path.name}")
-        
-        print(f"Processed {len(processed_videos)} videos")
-        
-        # Create individual video pairs
-        video_pairs = self.create_video_pairs(processed_videos, input_video)
-        
-        if video_pairs:
-            print(f"Created {len(video_pairs)} video pairs:")
-            for pair in video_pairs:
-                print(f"  - {pair.name}")
-            print("Process completed successfully!")
-        else:
-            print("Failed to create video pairs")
-        
-        # Clean up temporary files
-        self.cleanup_temp_files()
-
-def main():
-    processor = TikTokVideoProcessor()
-    processor.run()
-
-if __name__ == "__main__":
+import os
+import sys
+import subprocess
+from pathlib import Path
+import yt_dlp
+from moviepy import VideoFileClip, ImageClip, CompositeVideoClip, concatenate_videoclips
+import numpy as np
+from PIL import Image
+import shutil
+import json
+import queue
+import re
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from contextlib import ExitStack
+from urllib.parse import urlparse
+
+# The supported TikTok profile URL formats, compiled once as a single
+# alternation so matching is one scan instead of up to four re.search calls
+_TIKTOK_URL_RE = re.compile(
+    r'tiktok\.com/@([^/?]+)'
+    r'|tiktok\.com/user/([^/?]+)'
+    r'|vm\.tiktok\.com/([^/?]+)'
+    r'|tiktok\.com/([^/@?]+)/?$'
+)
+
+def _first_match(folder, extensions):
+    """Return the first file in folder with one of the given extensions
+
+    A single os.scandir pass instead of one glob per extension; entries
+    are sorted by name so the result is deterministic.
+    """
+    suffixes = tuple(ext.lower() for ext in extensions)
+    try:
+        with os.scandir(folder) as it:
+            for entry in sorted(it, key=lambda e: e.name):
+                if entry.is_file() and entry.name.lower().endswith(suffixes):
+                    return Path(entry.path)
+    except OSError:
+        pass
+    return None
+
+def _run_ffmpeg_cmd(args, timeout=600):
+    """Run an ffmpeg command, raising CalledProcessError on failure"""
+    cmd = ['ffmpeg', '-hide_banner', '-loglevel', 'error', '-y'] + args
+    subprocess.run(cmd, check=True, timeout=timeout)
+
+def _process_one(job):
+    """Worker entry point: run the ffmpeg commands for one pair build
+
+    Module-level so ProcessPoolExecutor can pickle it into worker processes.
+    """
+    cmds, output_path = job
+    for args in cmds:
+        _run_ffmpeg_cmd(args)
+    return Path(output_path)
+
+class TikTokVideoProcessor:
+    # Shared write_videofile settings for the MoviePy fallbacks:
+    # multi-threaded x264, no progress-bar logger overhead, consistent fps
+    _MOVIEPY_WRITE_KWARGS = {
+        'codec': 'libx264',
+        'audio_codec': 'aac',
+        'preset': 'veryfast',
+        'threads': os.cpu_count(),
+        'ffmpeg_params': ['-crf', '23', '-pix_fmt', 'yuv420p',
+                          '-movflags', '+faststart'],
+        'remove_temp': True,
+        'fps': 30,  # Force consistent FPS
+        'logger': None,
+    }
+
+    def __init__(self):
+        self.input_folder = Path("input")
+        self.output_folder = Path("output")
+        self.temp_folder = Path("temp")
+        self.overlay_folder = Path("overlay")
+        
+        # Create folders if they don't exist
+        self.input_folder.mkdir(exist_ok=True)
+        self.output_folder.mkdir(exist_ok=True)
+        self.temp_folder.mkdir(exist_ok=True)
+        self.overlay_folder.mkdir(exist_ok=True)
+
+        # Prefer the GPU encoder when the local ffmpeg build supports it
+        self.hw_encoder = self._detect_hw_encoder()
+        if self.hw_encoder:
+            print(f"Using hardware encoder: {self.hw_encoder}")
+
+        # The overlay is static for the whole batch: resolve it once and
+        # memoize any pre-scaled variants per target resolution
+        self._overlay_path = self._find_overlay()
+        self._overlay_cache = {}
+        self._overlay_clip_cache = {}  # MoviePy fallback, keyed by video size
+
+        # One-time normalized copy of the input video, keyed by
+        # (path, resolution) - see _normalize_input
+        self._input_norm_cache = {}
+
+        # Per-thread YoutubeDL instances (see _thread_ydl)
+        self._ydl_local = threading.local()
+
+    def _detect_hw_encoder(self):
+        """Probe ffmpeg for a hardware H.264 encoder; returns its name or None
+
+        Candidates are tried in preference order (NVIDIA, Intel Quick Sync,
+        Apple VideoToolbox). Being listed by `ffmpeg -encoders` only means
+        the build has the codepath, so each candidate is verified with a
+        tiny test encode before it is trusted.
+        """
+        try:
+            result = subprocess.run(
+                ['ffmpeg', '-hide_banner', '-encoders'],
+                capture_output=True, text=True, timeout=30)
+        except (subprocess.SubprocessError, FileNotFoundError, OSError):
+            return None
+        if result.returncode != 0:
+            return None
+        for encoder in ('h264_nvenc', 'h264_qsv', 'h264_videotoolbox'):
+            if encoder not in result.stdout:
+                continue
+            try:
+                probe = subprocess.run(
+                    ['ffmpeg', '-hide_banner', '-loglevel', 'error',
+                     '-f', 'lavfi', '-i', 'color=c=black:s=256x256:d=0.1',
+                     '-c:v', encoder, '-f', 'null', '-'],
+                    capture_output=True, timeout=30)
+            except (subprocess.SubprocessError, OSError):
+                continue
+            if probe.returncode == 0:
+                return encoder
+        return None
+
+    def _video_codec_args(self):
+        """Video encoder arguments: hardware encoder when available, libx264 otherwise"""
+        if self.hw_encoder == 'h264_nvenc':
+            return ['-c:v', 'h264_nvenc', '-preset', 'p4', '-tune', 'hq',
+                    '-rc', 'vbr', '-cq', '23', '-b:v', '0']
+        if self.hw_encoder == 'h264_qsv':
+            return ['-c:v', 'h264_qsv', '-preset', 'veryfast',
+                    '-global_quality', '23']
+        if self.hw_encoder == 'h264_videotoolbox':
+            return ['-c:v', 'h264_videotoolbox', '-q:v', '55']
+        return ['-c:v', 'libx264', '-preset', 'veryfast', '-crf', '23']
+
+    def _normalized_output_args(self):
+        """Output knobs shared by the segment and input-normalization encodes
+
+        Emitting both with identical codec/profile/timebase/audio
+        parameters is what makes the later concat a guaranteed stream
+        copy - heterogeneous TikTok sources all land on one fixed profile.
+        """
+        return [
+            *self._video_codec_args(),
+            '-profile:v', 'high',
+            '-pix_fmt', 'yuv420p',
+            '-video_track_timescale', '90000',
+            '-movflags', '+faststart',
+            '-c:a', 'aac', '-ar', '48000', '-ac', '2', '-b:a', '128k',
+        ]
+
+    def validate_video_file(self, video_path):
+        """Validate that a video file is not corrupted and can be read
+
+        Probes the stream metadata with ffprobe and dry-decodes the first
+        fraction of a second - no MoviePy clip (and its ffmpeg reader
+        process) is spun up just to read duration/fps/size.
+        """
+        print(f"Validating video file: {video_path.name}")
+        print(f"File size: {video_path.stat().st_size / (1024*1024):.1f} MB")
+
+        try:
+            info = self._probe_video(video_path)
+        except (subprocess.CalledProcessError, subprocess.TimeoutExpired,
+                json.JSONDecodeError) as e:
+            print(f"❌ Video validation failed for {video_path.name}: {e}")
+            return False
+        except FileNotFoundError:
+            # ffprobe not installed - fall back to the MoviePy probe
+            return self._validate_video_file_moviepy(video_path)
+
+        video_stream = next((s for s in info.get('streams', [])
+                             if s.get('codec_type') == 'video'), None)
+        if not video_stream:
+            print(f"❌ No video stream found in {video_path.name}")
+            return False
+
+        try:
+            duration = float(info.get('format', {}).get('duration', 0))
+        except (TypeError, ValueError):
+            duration = 0
+        num, _, den = video_stream.get('r_frame_rate', '0/1').partition('/')
+        try:
+            fps = float(num) / float(den or 1)
+        except (ValueError, ZeroDivisionError):
+            fps = 0
+        width = video_stream.get('width', 0)
+        height = video_stream.get('height', 0)
+
+        print(f"Duration: {duration:.2f} seconds")
+        print(f"FPS: {fps}")
+        print(f"Size: {width}x{height}")
+
+        if duration <= 0:
+            print(f"❌ Invalid duration: {duration}")
+            return False
+        if fps <= 0:
+            print(f"❌ Invalid FPS: {fps}")
+            return False
+        if width <= 0 or height <= 0:
+            print(f"❌ Invalid size: {width}x{height}")
+            return False
+
+        # Quick integrity check: dry-decode the first ~0.1s to the null muxer
+        try:
+            subprocess.run(
+                ['ffmpeg', '-v', 'error', '-i', str(video_path),
+                 '-t', '0.1', '-f', 'null', '-'],
+                check=True, timeout=60)
+            print(f"✓ Successfully decoded start of video")
+        except (subprocess.CalledProcessError, subprocess.TimeoutExpired) as e:
+            print(f"❌ Failed to decode video: {e}")
+            return False
+
+        print(f"✓ Video validation passed")
+        return True
+
+    def _validate_video_file_moviepy(self, video_path):
+        """Fallback: validate a video through MoviePy when ffprobe is missing"""
+        try:
+            with VideoFileClip(str(video_path)) as test_clip:
+                # Try to read basic properties
+                duration = test_clip.duration
+                fps = test_clip.fps
+                size = test_clip.size
+                
+                print(f"Duration: {duration:.2f} seconds")
+                print(f"FPS: {fps}")
+                print(f"Size: {size[0]}x{size[1]}")
+                
+                # Check if properties are valid
+                if duration <= 0:
+                    print(f"❌ Invalid duration: {duration}")
+                    return False
+                if fps <= 0:
+                    print(f"❌ Invalid FPS: {fps}")
+                    return False
+                if size[0] <= 0 or size[1] <= 0:
+                    print(f"❌ Invalid size: {size}")
+                    return False
+                    
+                # Try to read a frame from the middle
+                try:
+                    test_frame = test_clip.get_frame(duration / 2)
+                    print(f"✓ Successfully read frame from middle of video")
+                except Exception as frame_error:
+                    print(f"❌ Failed to read frame: {frame_error}")
+                    return False
+                
+                print(f"✓ Video validation passed")
+                return True
+                
+        except Exception as e:
+            print(f"❌ Video validation failed for {video_path.name}: {e}")
+            return False
+    
+    def get_overlay_image(self):
+        """Get the overlay image resolved at startup"""
+        return self._overlay_path
+
+    def _find_overlay(self):
+        """Scan the overlay folder once for an overlay image"""
+        image_extensions = ['.png', '.jpg', '.jpeg', '.gif', '.bmp']
+        return _first_match(self.overlay_folder, image_extensions)
+
+    def _overlay_input_args(self, target_w, target_h):
+        """ffmpeg input arguments for the overlay, decoded once per resolution
+
+        The image is decoded (and scaled down to fit, if oversized) a
+        single time through Pillow and cached as raw RGBA bytes in temp/,
+        so the per-pair ffmpeg runs skip the PNG decode entirely.
+        """
+        if not self._overlay_path:
+            return None
+
+        key = (target_w, target_h)
+        if key not in self._overlay_cache:
+            try:
+                with Image.open(self._overlay_path) as img:
+                    img = img.convert('RGBA')
+                    if img.width > target_w or img.height > target_h:
+                        img.thumbnail((target_w, target_h))
+                    raw_path = self.temp_folder / f"overlay_{img.width}x{img.height}.rgba"
+                    raw_path.write_bytes(img.tobytes())
+                    video_size = f"{img.width}x{img.height}"
+                self._overlay_cache[key] = [
+                    '-f', 'rawvideo', '-pixel_format', 'rgba',
+                    '-video_size', video_size,
+                    '-i', str(raw_path)
+                ]
+            except OSError:
+                # Unreadable through Pillow: hand ffmpeg the original file
+                self._overlay_cache[key] = ['-i', str(self._overlay_path)]
+        return self._overlay_cache[key]
+    
+    def extract_username_from_url(self, url):
+        """Extract username from TikTok profile URL"""
+        match = _TIKTOK_URL_RE.search(url)
+        if match:
+            # One scan over the URL; exactly one alternative's group matched
+            return next(group for group in match.groups() if group)
+
+        raise ValueError("Invalid TikTok URL format")
+    
+    def _fast_rmtree(self, path):
+        """Remove a directory tree, unlinking its files in parallel
+
+        shutil.rmtree unlinks serially; with dozens of multi-MB MP4s in
+        temp/ the syscalls dominate. unlink() releases the GIL, so a
+        small thread pool overlaps them, then the (rare) subdirectories
+        and the emptied root are removed normally.
+        """
+        files = []
+        subdirs = []
+        with os.scandir(path) as it:
+            for entry in it:
+                if entry.is_dir(follow_symlinks=False):
+                    subdirs.append(entry.path)
+                else:
+                    files.append(entry.path)
+        if files:
+            with ThreadPoolExecutor(max_workers=8) as executor:
+                list(executor.map(os.unlink, files))
+        for subdir in subdirs:
+            shutil.rmtree(subdir)
+        os.rmdir(path)
+
+    def clear_temp_folder(self):
+        """Clear temporary folder before starting"""
+        print("Clearing temporary folder...")
+        self._overlay_cache.clear()  # scaled variants live in temp/
+        self._input_norm_cache.clear()
+        try:
+            if self.temp_folder.exists():
+                self._fast_rmtree(self.temp_folder)
+            self.temp_folder.mkdir(exist_ok=True)
+        except Exception as e:
+            print(f"Error clearing temp folder: {e}")
+    
+    def download_tiktok_videos(self, profile_url, max_videos=50):
+        """Download TikTok videos from a profile"""
+        print(f"Downloading up to {max_videos} videos from {profile_url}")
+
+        downloaded_files = []
+
+        try:
+            entries = self._extract_entries(profile_url, max_videos)
+            if not entries:
+                print("No videos found in the profile")
+                return downloaded_files
+
+            print(f"Found {len(entries)} videos to download")
+
+            # Downloads are network-bound, so keep a few in flight
+            # at once (too many concurrent streams can trip
+            # TikTok's anti-bot detection - 4 is a safe middle ground)
+            with ThreadPoolExecutor(max_workers=4) as executor:
+                futures = {}
+                for i, entry in enumerate(entries):
+                    print(f"Queueing video {i+1}/{len(entries)}: {entry.get('title', 'Unknown')}")
+                    page_url = entry.get('webpage_url') or entry.get('url')
+                    future = executor.submit(self._download_one, i + 1, page_url)
+                    futures[future] = i + 1
+
+                for future in as_completed(futures):
+                    try:
+                        downloaded_file = future.result()
+                    except Exception as e:
+                        print(f"Error downloading video {futures[future]}: {e}")
+                        continue
+                    if downloaded_file:
+                        downloaded_files.append(downloaded_file)
+                        print(f"✓ Downloaded: {downloaded_file.name}")
+
+            # as_completed yields in finish order; restore playlist order
+            downloaded_files.sort()
+
+        except Exception as e:
+            print(f"Error downloading videos: {e}")
+
+        print(f"Successfully downloaded {len(downloaded_files)} out of {max_videos} requested videos")
+        return downloaded_files
+
+    def _extract_entries(self, profile_url, max_videos):
+        """List up to max_videos profile entries without downloading anything
+
+        Flat extraction returns lightweight stubs (id + page URL) instead
+        of fetching full metadata for every video in the profile; the
+        per-entry metadata is resolved later, in parallel, only for the
+        videos actually being processed.
+        """
+        ydl_opts = {
+            'format': 'best[ext=mp4]',
+            'playlistend': max_videos,
+            'playlistreverse': False,  # Get latest videos first
+            'quiet': True,
+            'no_warnings': True,
+            'extract_flat': 'in_playlist',
+            'ignoreerrors': True,  # Continue if some videos fail
+        }
+        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+            print("Extracting video information...")
+            info = ydl.extract_info(profile_url, download=False)
+        if not info or 'entries' not in info:
+            return []
+        # Filter out None entries and limit to max_videos
+        return [entry for entry in info['entries'] if entry is not None][:max_videos]
+
+    def _direct_stream_source(self, entry):
+        """Direct media URL + HTTP headers for an entry, if yt-dlp exposes them
+
+        Returns (url, headers) when the entry carries a usable CDN URL that
+        ffmpeg can read over the network, else None. Flat playlist stubs
+        put the video *page* URL in 'url', which ffmpeg can't read - those
+        need full resolution first.
+        """
+        if entry.get('_type') in ('url', 'url_transparent'):
+            return None
+        url = entry.get('url')
+        if not url or not url.startswith(('http://', 'https://')):
+            return None
+        return url, entry.get('http_headers') or {}
+
+    def _thread_ydl(self):
+        """Per-thread YoutubeDL instance, built once and reused
+
+        Constructing YoutubeDL re-parses options and rebuilds extractor
+        state on every call; each download worker thread keeps a single
+        instance alive for the whole batch instead.
+        """
+        if getattr(self._ydl_local, 'ydl', None) is None:
+            local = self._ydl_local
+            local.finished = []
+            ydl = yt_dlp.YoutubeDL({
+                'format': 'best[ext=mp4]',
+                'outtmpl': str(self.temp_folder / 'video_%(id)s.%(ext)s'),
+                'quiet': True,
+                'no_warnings': True,
+                # Fragmented formats download several pieces at once too
+                'concurrent_fragment_downloads': 4,
+                # 10 MB range requests over the kept-alive connection;
+                # sidesteps CDN throttling of long single streams
+                'http_chunk_size': 10485760,
+            })
+
+            # yt-dlp reports the final filename itself; recording it here
+            # beats re-discovering it with a directory glob afterwards
+            def _record_finished(d):
+                if d.get('status') == 'finished' and d.get('filename'):
+                    local.finished.append(d['filename'])
+
+            ydl.add_progress_hook(_record_finished)
+            local.ydl = ydl
+        return self._ydl_local.ydl
+
+    def _download_one(self, index, video_url):
+        """Download a single TikTok video; returns the validated path or None"""
+        ydl = self._thread_ydl()
+        # Only the output template varies between videos; override it in
+        # place rather than paying the constructor cost per download.
+        # YoutubeDL normalizes outtmpl into a dict at init, so the
+        # override has to target the 'default' key
+        ydl.params['outtmpl']['default'] = str(self.temp_folder / f'video_{index:03d}_%(title)s.%(ext)s')
+        self._ydl_local.finished = []
+        ydl.download([video_url])
+
+        # The progress hook recorded the final path; the glob is only a
+        # safety net for formats that never report 'finished'
+        downloaded_file = None
+        for name in self._ydl_local.finished:
+            candidate = Path(name)
+            if candidate.exists():
+                downloaded_file = candidate
+                break
+        if downloaded_file is None:
+            for file in self.temp_folder.glob(f"video_{index:03d}_*.mp4"):
+                downloaded_file = file
+                break
+
+        if downloaded_file and downloaded_file.exists():
+            # Validate the downloaded video
+            if self.validate_video_file(downloaded_file):
+                return downloaded_file
+            print(f"✗ Downloaded file appears corrupted: {downloaded_file.name}")
+            # Try to delete corrupted file
+            try:
+                downloaded_file.unlink()
+            except OSError:
+                pass
+        else:
+            print(f"✗ Failed to find downloaded file for video {index}")
+        return None
+    
+    def _run_ffmpeg(self, args, timeout=600):
+        """Run an ffmpeg command, raising CalledProcessError on failure"""
+        _run_ffmpeg_cmd(args, timeout=timeout)
+
+    def process_video(self, video_path, max_duration=20, add_overlay=True):
+        """Process individual video: cut to max duration and add image overlay if specified
+
+        Runs a single ffmpeg pass (trim + overlay + encode) so frames never
+        round-trip through Python. Falls back to MoviePy if ffmpeg fails.
+        """
+        print(f"Processing video: {video_path.name}")
+
+        output_path = self.temp_folder / f"processed_{video_path.name}"
+
+        overlay_image_path = self.get_overlay_image() if add_overlay else None
+        if add_overlay and not overlay_image_path:
+            print("No overlay image found in overlay folder")
+
+        # Input-side -t stops the demuxer at max_duration, so decode work
+        # is bounded to the first 20s; the filter chain then composites
+        # the overlay (centered) and forces consistent FPS in libavfilter
+        args = ['-t', str(max_duration), '-i', str(video_path)]
+        if overlay_image_path:
+            print(f"Adding overlay: {overlay_image_path.name}")
+            args += ['-i', str(overlay_image_path)]
+            filter_complex = "[0:v][1:v]overlay=(W-w)/2:(H-h)/2,fps=30[out]"
+        else:
+            filter_complex = "[0:v]fps=30[out]"
+
+        args += [
+            '-filter_complex', filter_complex,
+            '-map', '[out]', '-map', '0:a?',
+            '-avoid_negative_ts', 'make_zero',
+            *self._video_codec_args(),
+            '-pix_fmt', 'yuv420p',
+            '-movflags', '+faststart',
+            '-c:a', 'aac',
+            str(output_path)
+        ]
+
+        try:
+            self._run_ffmpeg(args)
+            return output_path
+        except (subprocess.CalledProcessError, subprocess.TimeoutExpired, FileNotFoundError) as e:
+            print(f"ffmpeg processing failed for {video_path.name} ({e}), falling back to MoviePy")
+            return self._process_video_moviepy(video_path, max_duration, add_overlay)
+
+    def _overlay_clip_for(self, overlay_image_path, video_w, video_h):
+        """Overlay ImageClip sized for a video, decoded once per video size
+
+        The PNG decode and resample are identical for every video of the
+        same dimensions, so the base clip is cached on the instance
+        instead of being rebuilt per call. Cached clips share one pixel
+        array; the per-video with_position/with_duration wrappers are free.
+        """
+        key = (video_w, video_h)
+        overlay_clip = self._overlay_clip_cache.get(key)
+        if overlay_clip is None:
+            # Header-only read: learn the size without decoding any pixels
+            with Image.open(overlay_image_path) as im:
+                overlay_w, overlay_h = im.size
+                # Resize overlay to fit video if needed (optional) -
+                # decoding straight to the target size through Pillow
+                # instead of ImageClip-then-resize
+                if overlay_w > video_w or overlay_h > video_h:
+                    scaled_h = max(1, round(overlay_h * video_w / overlay_w))
+                    resized = im.convert('RGBA').resize((video_w, scaled_h))
+                    overlay_clip = ImageClip(np.asarray(resized))
+                else:
+                    overlay_clip = ImageClip(str(overlay_image_path))
+            self._overlay_clip_cache[key] = overlay_clip
+        return overlay_clip
+
+    def _process_video_moviepy(self, video_path, max_duration=20, add_overlay=True):
+        """Fallback: process a video through MoviePy when direct ffmpeg fails
+
+        Clip lifetimes are scoped with an ExitStack instead of hand-rolled
+        close() bookkeeping in a try/finally.
+        """
+        try:
+            with ExitStack() as stack:
+                print(f"Processing video: {video_path.name}")
+
+                # Load video with error handling for corrupted frames
+                clip = VideoFileClip(str(video_path))
+                stack.callback(clip.close)
+
+                # Validate the clip duration to avoid frame index issues
+                actual_duration = clip.duration
+                if actual_duration <= 0:
+                    print(f"Warning: Video {video_path.name} has invalid duration: {actual_duration}")
+                    return None
+
+                # Cut to maximum duration if needed, but leave a small buffer to avoid frame issues
+                if actual_duration > max_duration:
+                    # Use a slightly shorter duration to avoid frame index errors
+                    safe_duration = min(max_duration, actual_duration - 0.1)
+                    clip = clip.subclip(0, max(safe_duration, 1.0))  # Ensure at least 1 second
+
+                # Add overlay if specified and overlay image exists
+                final_clip = clip
+                if add_overlay:
+                    overlay_image_path = self.get_overlay_image()
+                    if overlay_image_path:
+                        print(f"Adding overlay: {overlay_image_path.name}")
+                        # Reuse the decoded (and resized) overlay across videos
+                        overlay_clip = self._overlay_clip_for(overlay_image_path,
+                                                              clip.w, clip.h)
+
+                        # Position overlay at center of video and set duration
+                        overlay_clip = overlay_clip.with_position('center').with_duration(clip.duration)
+
+                        # Composite video with overlay
+                        final_clip = CompositeVideoClip([clip, overlay_clip])
+                        stack.callback(final_clip.close)
+                    else:
+                        print("No overlay image found in overlay folder")
+
+                # Save processed video with consistent encoding settings and error handling
+                output_path = self.temp_folder / f"processed_{video_path.name}"
+
+                # Use more conservative encoding settings to handle problematic videos
+                final_clip.write_videofile(
+                    str(output_path),
+                    temp_audiofile=str(self.temp_folder / f"temp-audio-{video_path.stem}.m4a"),
+                    **self._MOVIEPY_WRITE_KWARGS
+                )
+
+                return output_path
+
+        except Exception as e:
+            print(f"Error processing video {video_path.name}: {e}")
+            return None
+    
+    def get_input_video(self):
+        """Get the input video from the input folder"""
+        video_extensions = ['.mp4', '.avi', '.mov', '.mkv', '.wmv', '.flv']
+
+        print("Scanning input folder for video files...")
+        print(f"Input folder path: {self.input_folder.absolute()}")
+
+        video_file = _first_match(self.input_folder, video_extensions)
+        if video_file:
+            size_mb = video_file.stat().st_size / (1024*1024)
+            print(f"  - {video_file.name} ({size_mb:.1f} MB)")
+            return video_file
+
+        print("❌ No video files found in input folder!")
+        print("Expected file types:", ", ".join(video_extensions))
+        return None
+    
+    def _probe_video(self, video_path):
+        """Probe a media file with ffprobe and return the parsed JSON info"""
+        cmd = ['ffprobe', '-v', 'quiet', '-print_format', 'json',
+               '-show_streams', '-show_format', str(video_path)]
+        return json.loads(subprocess.check_output(cmd, timeout=60))
+
+    def _video_resolution(self, info):
+        """Extract (width, height) of the first video stream from ffprobe info"""
+        for stream in info.get('streams', []):
+            if stream.get('codec_type') == 'video':
+                return (stream['width'], stream['height'])
+        return None
+
+    def _has_audio(self, info):
+        """True when ffprobe info contains an audio stream"""
+        return any(stream.get('codec_type') == 'audio'
+                   for stream in info.get('streams', []))
+
+    def _stream_params(self, info):
+        """Comparable (video, audio) stream parameters from ffprobe info
+
+        Two files whose params compare equal can be concatenated with
+        stream copy; anything else needs a transcode.
+        """
+        video = audio = None
+        for stream in info.get('streams', []):
+            if stream.get('codec_type') == 'video' and video is None:
+                video = (stream.get('codec_name'), stream.get('width'),
+                         stream.get('height'), stream.get('r_frame_rate'),
+                         stream.get('pix_fmt'))
+            elif stream.get('codec_type') == 'audio' and audio is None:
+                audio = (stream.get('codec_name'), stream.get('sample_rate'),
+                         stream.get('channels'))
+        return (video, audio)
+
+    def _copy_mode(self, video_path, input_resolution):
+        """How much of a local file can be stream-copied into a segment
+
+        TikTok sources are very often already H.264 at the target vertical
+        resolution and 30fps, so re-encoding them reproduces the same
+        pixels at full CPU cost. Returns 'full' when video and audio both
+        match the fixed profile, 'video' when only the video stream does
+        (the audio gets a cheap transcode), or None for a full encode.
+        """
+        try:
+            video, audio = self._stream_params(self._probe_video(video_path))
+        except (subprocess.CalledProcessError, subprocess.TimeoutExpired,
+                FileNotFoundError, json.JSONDecodeError):
+            return None
+        target_w, target_h = input_resolution
+        if video != ('h264', target_w, target_h, '30/1', 'yuv420p'):
+            return None
+        if audio is None:
+            # No audio track at all: the encode path has to synthesize
+            # silence or the later stream-copy concat falls apart
+            return None
+        if audio == ('aac', '48000', 2):
+            return 'full'
+        return 'video'
+
+    def _write_concat_list(self, paths, list_path):
+        """Write a concat demuxer list file for the given input videos"""
+        with open(list_path, 'w', encoding='utf-8') as f:
+            for p in paths:
+                escaped = str(Path(p).resolve()).replace("'", "'\\''")
+                f.write(f"file '{escaped}'\n")
+        return list_path
+
+    def create_video_pairs(self, processed_videos, input_video_path):
+        """Create individual video pairs: each TikTok video + input video
+
+        Uses ffmpeg's concat demuxer with stream copy when resolutions match
+        (a remux, no re-encode), or a single-pass concat filter otherwise.
+        Falls back to MoviePy if ffmpeg/ffprobe aren't usable.
+        """
+        print("Creating individual video pairs...")
+
+        if not input_video_path or not input_video_path.exists():
+            print("Input video not found")
+            return []
+
+        try:
+            input_info = self._probe_video(input_video_path)
+        except (subprocess.CalledProcessError, subprocess.TimeoutExpired,
+                FileNotFoundError, json.JSONDecodeError) as e:
+            print(f"ffprobe failed on input video ({e}), falling back to MoviePy")
+            return self._create_video_pairs_moviepy(processed_videos, input_video_path)
+
+        input_resolution = self._video_resolution(input_info)
+        input_params = self._stream_params(input_info)
+
+        if not input_resolution:
+            print("Input video has no video stream")
+            return []
+
+        print(f"Input video resolution: {input_resolution[0]}x{input_resolution[1]}")
+
+        created_pairs = []
+
+        for i, video_path in enumerate(processed_videos):
+            if not (video_path and video_path.exists()):
+                continue
+
+            output_path = self.output_folder / f"video_pair_{i+1:02d}.mp4"
+
+            try:
+                print(f"Creating pair {i+1}/{len(processed_videos)}")
+
+                tiktok_info = self._probe_video(video_path)
+                tiktok_resolution = self._video_resolution(tiktok_info)
+                print(f"  TikTok video resolution: {tiktok_resolution[0]}x{tiktok_resolution[1]}")
+
+                if self._stream_params(tiktok_info) == input_params:
+                    # Identical codec/fps/pixfmt/geometry: concatenate by
+                    # remuxing the existing streams - I/O-bound instead
+                    # of encode-bound
+                    print(f"  ✓ Stream parameters match, concatenating with stream copy")
+                    list_path = self._write_concat_list(
+                        [video_path, input_video_path],
+                        self.temp_folder / f"concat_{i+1:02d}.txt"
+                    )
+                    self._run_ffmpeg([
+                        '-f', 'concat', '-safe', '0', '-i', str(list_path),
+                        '-c', 'copy', str(output_path)
+                    ])
+                else:
+                    print(f"  ⚠️  Resolution mismatch detected!")
+                    print(f"  📐 Scaling TikTok video to fill frame (no black borders)...")
+
+                    target_w, target_h = input_resolution
+                    filter_complex = (
+                        f"[0:v]scale={target_w}:{target_h}:force_original_aspect_ratio=increase,"
+                        f"crop={target_w}:{target_h},fps=30[v0];"
+                        f"[v0][0:a][1:v][1:a]concat=n=2:v=1:a=1[v][a]"
+                    )
+                    self._run_ffmpeg([
+                        '-i', str(video_path), '-i', str(input_video_path),
+                        '-filter_complex', filter_complex,
+                        '-map', '[v]', '-map', '[a]',
+                        *self._video_codec_args(),
+                        '-pix_fmt', 'yuv420p',
+                        '-movflags', '+faststart',
+                        '-c:a', 'aac',
+                        str(output_path)
+                    ])
+
+                created_pairs.append(output_path)
+                print(f"  ✓ Created: {output_path.name}")
+
+            except (subprocess.CalledProcessError, subprocess.TimeoutExpired, OSError) as e:
+                print(f"Error creating pair {i+1}: {e}")
+                continue
+
+        return created_pairs
+
+    def _create_video_pairs_moviepy(self, processed_videos, input_video_path):
+        """Fallback: create pairs through MoviePy when direct ffmpeg fails"""
+        created_pairs = []
+
+        try:
+            # Load input video once to get its properties
+            input_clip_template = VideoFileClip(str(input_video_path))
+            input_resolution = input_clip_template.size
+            input_fps = input_clip_template.fps
+            print(f"Input video resolution: {input_resolution[0]}x{input_resolution[1]} @ {input_fps} FPS")
+            input_clip_template.close()
+            
+            for i, video_path in enumerate(processed_videos):
+                if video_path and video_path.exists():
+                    try:
+                        # Scope all clips for this pair to one ExitStack -
+                        # no manual close() bookkeeping on every exit path
+                        with ExitStack() as stack:
+                            print(f"Creating pair {i+1}/{len(processed_videos)}")
+
+                            # Load fresh clips for each pair to avoid corruption
+                            tiktok_clip = VideoFileClip(str(video_path))
+                            stack.callback(tiktok_clip.close)
+                            input_clip = VideoFileClip(str(input_video_path))  # Fresh load each time
+                            stack.callback(input_clip.close)
+
+                            # Display resolution information
+                            tiktok_resolution = tiktok_clip.size
+                            print(f"  TikTok video resolution: {tiktok_resolution[0]}x{tiktok_resolution[1]}")
+                            print(f"  Input video resolution: {input_resolution[0]}x{input_resolution[1]}")
+
+                            # Validate clip durations before concatenation
+                            if tiktok_clip.duration <= 0 or input_clip.duration <= 0:
+                                print(f"Warning: Invalid clip duration for pair {i+1}, skipping")
+                                continue
+
+                            # Handle resolution differences
+                            if tiktok_resolution != input_resolution:
+                                print(f"  ⚠️  Resolution mismatch detected!")
+                                print(f"  📐 Scaling TikTok video to fill frame (no black borders)...")
+
+                                target_w, target_h = input_resolution
+                                tiktok_w, tiktok_h = tiktok_resolution
+
+                                # Determine the scaling factor to fill the frame
+                                scale_factor = max(target_w / tiktok_w, target_h / tiktok_h)
+                                new_w = int(tiktok_w * scale_factor)
+                                new_h = int(tiktok_h * scale_factor)
+
+                                print(f"  📏 Scaling from {tiktok_w}x{tiktok_h} to {new_w}x{new_h}")
+
+                                # Re-open the clip so ffmpeg's reader hands us
+                                # frames already scaled (swscale in C) instead
+                                # of resizing every frame through Pillow
+                                tiktok_clip = VideoFileClip(str(video_path),
+                                                            target_resolution=(new_h, new_w))
+                                stack.callback(tiktok_clip.close)
+
+                                # Crop the resized clip from the center if its size doesn't match the target.
+                                if tiktok_clip.size != (target_w, target_h):
+                                    print(f"  ✂️  Cropping to exact size {target_w}x{target_h}")
+                                    crop_x = (tiktok_clip.w - target_w) // 2
+                                    crop_y = (tiktok_clip.h - target_h) // 2
+
+                                    tiktok_clip = tiktok_clip.crop(x1=crop_x, y1=crop_y, width=target_w, height=target_h)
+
+                                print(f"  ✓ TikTok video scaled to {target_w}x{target_h} (no black borders)")
+                            else:
+                                print(f"  ✓ Resolutions match, no resizing needed")
+
+                            # Create pair: TikTok video + input video
+                            # Now both videos should have the same resolution
+                            pair_video = concatenate_videoclips([tiktok_clip, input_clip])
+                            stack.callback(pair_video.close)
+
+                            # Save pair with consistent encoding and better error handling
+                            output_path = self.output_folder / f"video_pair_{i+1:02d}.mp4"
+                            pair_video.write_videofile(
+                                str(output_path),
+                                temp_audiofile=str(self.temp_folder / f"temp-audio-pair-{i+1:02d}.m4a"),
+                                **self._MOVIEPY_WRITE_KWARGS
+                            )
+
+                            created_pairs.append(output_path)
+                            print(f"  ✓ Created: {output_path.name}")
+
+                    except Exception as e:
+                        print(f"Error creating pair {i+1}: {e}")
+                        continue
+            
+            return created_pairs
+            
+        except Exception as e:
+            print(f"Error creating video pairs: {e}")
+            return []
+    
+    def _normalize_input(self, input_path, input_resolution):
+        """Re-encode the input video once with the pipeline's fixed params
+
+        Every pair appends the same input clip, so it gets encoded a
+        single time and then stream-copied into each output instead of
+        being re-encoded per pair. Memoized per (path, resolution).
+        """
+        key = (str(input_path), input_resolution)
+        if key not in self._input_norm_cache:
+            target_w, target_h = input_resolution
+            norm_path = self.temp_folder / "input_norm.mp4"
+            print("Normalizing input video (one-time encode)...")
+
+            # The fixed profile promises both streams; an audio-less input
+            # would break the stream-copy concat against every segment, so
+            # pad it with silence
+            try:
+                has_audio = self._has_audio(self._probe_video(input_path))
+            except (subprocess.CalledProcessError, subprocess.TimeoutExpired,
+                    FileNotFoundError, json.JSONDecodeError):
+                has_audio = True
+
+            args = ['-i', str(input_path)]
+            if not has_audio:
+                args += ['-f', 'lavfi',
+                         '-i', 'anullsrc=channel_layout=stereo:sample_rate=48000',
+                         '-map', '0:v', '-map', '1:a', '-shortest']
+            args += [
+                '-vf', f"scale={target_w}:{target_h},fps=30,setsar=1",
+                *self._normalized_output_args(),
+                str(norm_path)
+            ]
+            self._run_ffmpeg(args)
+            self._input_norm_cache[key] = norm_path
+        return self._input_norm_cache[key]
+
+    def _build_pair_cmds(self, tiktok_source, overlay_path, input_norm_path,
+                         output_path, input_resolution, max_duration=20,
+                         http_headers=None, has_audio=None):
+        """Build the ffmpeg commands for one pair: segment encode + remux
+
+        tiktok_source may be a local file or a direct media URL; for URLs
+        the extractor's HTTP headers are passed through so the CDN accepts
+        the request. has_audio=None means "probe local files, assume True
+        for URLs"; audio-less sources get silence synthesized so every
+        segment matches the fixed two-stream profile.
+        """
+        target_w, target_h = input_resolution
+
+        overlay_args = self._overlay_input_args(target_w, target_h) if overlay_path else None
+
+        segment_path = self.temp_folder / f"segment_{output_path.stem}.mp4"
+
+        # Local sources whose video stream already carries the normalized
+        # profile need no overlay burn-in or rescale - trim them with a
+        # stream copy, transcoding only the audio if it doesn't match
+        copy_mode = None
+        if overlay_args is None and not http_headers:
+            copy_mode = self._copy_mode(tiktok_source, input_resolution)
+        if copy_mode:
+            if copy_mode == 'full':
+                codec_args = ['-c', 'copy']
+            else:
+                codec_args = ['-c:v', 'copy', '-c:a', 'aac',
+                              '-ar', '48000', '-ac', '2', '-b:a', '128k']
+            segment_args = [
+                '-t', str(max_duration), '-i', str(tiktok_source),
+                *codec_args,
+                '-avoid_negative_ts', 'make_zero',
+                '-video_track_timescale', '90000',
+                str(segment_path)
+            ]
+            list_path = self._write_concat_list(
+                [segment_path, input_norm_path],
+                self.temp_folder / f"{output_path.stem}.txt"
+            )
+            return [segment_args,
+                    ['-f', 'concat', '-safe', '0', '-i', str(list_path),
+                     '-c', 'copy', str(output_path)]]
+
+        # URLs can't be probed cheaply, so streamed sources are assumed to
+        # carry audio (a wrong guess fails over to the disk-download path,
+        # which probes for real)
+        if has_audio is None:
+            if http_headers:
+                has_audio = True
+            else:
+                try:
+                    has_audio = self._has_audio(self._probe_video(tiktok_source))
+                except (subprocess.CalledProcessError, subprocess.TimeoutExpired,
+                        FileNotFoundError, json.JSONDecodeError):
+                    has_audio = True
+
+        # Input-side -t bounds demuxing of the TikTok video to the first
+        # max_duration seconds - cheaper than trimming in the filter graph
+        args = []
+        if http_headers:
+            args += ['-headers', ''.join(f"{k}: {v}\r\n" for k, v in http_headers.items())]
+        args += ['-t', str(max_duration), '-i', str(tiktok_source)]
+        if overlay_args:
+            args += overlay_args
+        silence_idx = None
+        if not has_audio:
+            silence_idx = 2 if overlay_args else 1
+            args += ['-f', 'lavfi', '-t', str(max_duration),
+                     '-i', 'anullsrc=channel_layout=stereo:sample_rate=48000']
+
+        chain = (
+            f"[0:v]scale={target_w}:{target_h}:force_original_aspect_ratio=increase,"
+            f"crop={target_w}:{target_h},fps=30,setsar=1[tv]"
+        )
+        if overlay_args:
+            chain += ";[tv][1:v]overlay=(W-w)/2:(H-h)/2[outv]"
+        else:
+            chain += ";[tv]null[outv]"
+        if has_audio:
+            chain += ";[0:a]aformat=sample_rates=48000:channel_layouts=stereo[outa]"
+        else:
+            chain += f";[{silence_idx}:a]anull[outa]"
+
+        segment_args = args + [
+            '-filter_complex', chain,
+            '-map', '[outv]', '-map', '[outa]',
+            '-avoid_negative_ts', 'make_zero',
+            *self._normalized_output_args(),
+            '-threads', '2',  # several ffmpeg jobs run at once; don't oversubscribe
+        ]
+        if not has_audio:
+            segment_args += ['-shortest']  # silence must not outlast the video
+        segment_args += [str(segment_path)]
+
+        # Segment and normalized input share identical codec params, so
+        # the concatenation is a pure stream copy
+        list_path = self._write_concat_list(
+            [segment_path, input_norm_path],
+            self.temp_folder / f"{output_path.stem}.txt"
+        )
+        concat_args = [
+            '-f', 'concat', '-safe', '0', '-i', str(list_path),
+            '-c', 'copy', str(output_path)
+        ]
+
+        return [segment_args, concat_args]
+
+    def cleanup_temp_files(self):
+        """Clean up temporary files"""
+        print("Cleaning up temporary files...")
+        self._overlay_cache.clear()  # scaled variants live in temp/
+        self._input_norm_cache.clear()
+        try:
+            self._fast_rmtree(self.temp_folder)
+            self.temp_folder.mkdir(exist_ok=True)
+        except Exception as e:
+            print(f"Error cleaning up temp files: {e}")
+    
+    def _produce_downloads(self, profile_url, max_videos, work_queue):
+        """Producer: feed video sources to the queue as they become ready
+
+        Each flat stub is resolved to full metadata in the worker pool;
+        entries that expose a direct media URL are queued for streaming so
+        ffmpeg reads them straight off the CDN - no temp file, and the
+        trimmed read stops after max_duration seconds instead of pulling
+        the whole video. Entries without one are downloaded to disk first.
+        A None sentinel marks end-of-stream for the consumer side.
+        """
+        try:
+            entries = self._extract_entries(profile_url, max_videos)
+            if not entries:
+                print("No videos found in the profile")
+                return
+
+            print(f"Found {len(entries)} videos to process")
+
+            with ThreadPoolExecutor(max_workers=4) as executor:
+                futures = {
+                    executor.submit(self._resolve_source, i + 1, entry): i + 1
+                    for i, entry in enumerate(entries)
+                }
+                for future in as_completed(futures):
+                    index = futures[future]
+                    try:
+                        job = future.result()
+                    except Exception as e:
+                        print(f"Error fetching video {index}: {e}")
+                        continue
+                    if job:
+                        work_queue.put(job)
+        except Exception as e:
+            print(f"Error downloading videos: {e}")
+        finally:
+            work_queue.put(None)
+
+    def _resolve_source(self, index, entry):
+        """Resolve one playlist entry into a queueable pipeline job
+
+        Flat stubs get their full metadata fetched here (these calls run
+        in parallel across the download pool, where the old non-flat
+        enumeration fetched them serially). Entries with a direct media
+        URL become streaming jobs; the rest are downloaded to disk.
+        """
+        page_url = entry.get('webpage_url') or entry.get('url')
+        info = entry
+        if self._direct_stream_source(entry) is None:
+            info = self._thread_ydl().extract_info(page_url, download=False) or entry
+
+        source = self._direct_stream_source(info)
+        if source:
+            url, headers = source
+            return {'index': index, 'source': url, 'headers': headers,
+                    'entry': info}
+
+        downloaded_file = self._download_one(index, page_url)
+        if downloaded_file:
+            return {'index': index, 'source': downloaded_file,
+                    'headers': None, 'entry': None}
+        return None
+
+    def _run_pipeline(self, profile_url, max_videos, overlay_image, input_video,
+                      input_resolution):
+        """Overlap downloading and encoding via a producer-consumer queue
+
+        A downloader thread pushes each finished (already validated) file
+        into a bounded queue while a process pool runs the fused ffmpeg
+        pair builds - network-bound and CPU-bound work proceed in parallel
+        instead of as strict phases.
+        """
+        max_workers = max(1, min((os.cpu_count() or 2) // 2, 4))
+
+        # Encode the shared input clip once up front; every pair appends
+        # it by stream copy afterwards
+        try:
+            input_norm = self._normalize_input(input_video, input_resolution)
+        except (subprocess.CalledProcessError, subprocess.TimeoutExpired,
+                FileNotFoundError) as e:
+            print(f"Error normalizing input video: {e}")
+            return []
+
+        work_queue = queue.Queue(maxsize=4)
+        downloader = threading.Thread(
+            target=self._produce_downloads,
+            args=(profile_url, max_videos, work_queue),
+            daemon=True,
+        )
+        downloader.start()
+
+        video_pairs = []
+        jobs = {}
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            def submit(job):
+                output_path = self.output_folder / f"video_pair_{job['index']:02d}.mp4"
+                # Streamed entries carry their metadata; a declared
+                # audio-less source gets silence synthesized up front
+                entry = job.get('entry')
+                has_audio = False if (entry and entry.get('acodec') == 'none') else None
+                cmds = self._build_pair_cmds(job['source'], overlay_image, input_norm,
+                                             output_path, input_resolution,
+                                             http_headers=job['headers'],
+                                             has_audio=has_audio)
+                jobs[executor.submit(_process_one, (cmds, str(output_path)))] = job
+
+            while True:
+                job = work_queue.get()
+                if job is None:
+                    break
+                submit(job)
+
+            while jobs:
+                for future in as_completed(list(jobs)):
+                    job = jobs.pop(future)
+                    try:
+                        output_path = future.result()
+                        video_pairs.append(output_path)
+                        print(f"✓ Created: {output_path.name}")
+                    except (subprocess.CalledProcessError, subprocess.TimeoutExpired,
+                            FileNotFoundError) as e:
+                        if job['entry'] is not None:
+                            # Direct CDN URLs expire and some reject range
+                            # requests; fall back to a disk download once
+                            print(f"Streaming failed for video {job['index']}, "
+                                  f"downloading instead: {e}")
+                            try:
+                                downloaded = self._download_one(
+                                    job['index'], job['entry']['webpage_url'])
+                            except Exception as dl_error:
+                                print(f"Error downloading video {job['index']}: {dl_error}")
+                                continue
+                            if downloaded:
+                                submit({'index': job['index'], 'source': downloaded,
+                                        'headers': None, 'entry': None})
+                        else:
+                            print(f"Error building pair for video {job['index']}: {e}")
+
+        downloader.join()
+        video_pairs.sort()
+        return video_pairs
+
+    def run(self):
+        """Main execution function"""
+        print("=== TikTok Video Processor ===")
+        
+        # Clear temp folder to ensure clean start
+        self.clear_temp_folder()
+        
+        # Get input video
+        input_video = self.get_input_video()
+        if not input_video:
+            print("\n❌ No input video found in 'input' folder.")
+            print("\n💡 To fix this:")
+            print("1. Make sure you have a video file in the 'input' folder")
+            print("2. Supported formats: .mp4, .avi, .mov, .mkv, .wmv, .flv")
+            print("3. Try renaming your file to have a proper extension")
+            print("4. Make sure the file isn't corrupted")
+            return
+        
+        print(f"\n✓ Found input video: {input_video.name}")
+        
+        # Validate input video with detailed output
+        print("\n=== Validating Input Video ===")
+        if not self.validate_video_file(input_video):
+            print("\n❌ Input video appears to be corrupted or unreadable.")
+            print("\n💡 To fix this:")
+            print("1. Try re-downloading or re-copying the video file")
+            print("2. Convert the video to MP4 format using a video converter")
+            print("3. Check if the file is completely downloaded (not partial)")
+            print("4. Try a different video file")
+            print("5. Make sure the video isn't DRM-protected")
+            return
+        
+        # Check for overlay image
+        overlay_image = self.get_overlay_image()
+        if overlay_image:
+            print(f"Found overlay image: {overlay_image.name}")
+        else:
+            print("No overlay image found in 'overlay' folder. TikTok videos will have no overlay.")
+        
+        # Get TikTok profile URL
+        profile_url = input("Enter TikTok profile URL: ").strip()
+        if not profile_url:
+            print("No profile URL provided")
+            return
+        
+        # Validate and normalize URL
+        if not any(domain in profile_url for domain in ['tiktok.com', 'vm.tiktok.com']):
+            print("Invalid TikTok URL. Please use a valid TikTok profile URL.")
+            return
+        
+        print(f"Using profile URL: {profile_url}")
+        
+        # Get number of videos to download
+        try:
+            max_videos = int(input("Enter maximum number of videos to download (1-50): "))
+            if max_videos < 1 or max_videos > 50:
+                print("Number must be between 1 and 50")
+                return
+        except ValueError:
+            print("Invalid number format")
+            return
+        
+        # Probe the input video once; this decides between the pipelined
+        # ffmpeg path and the staged MoviePy-compatible fallback
+        try:
+            input_resolution = self._video_resolution(self._probe_video(input_video))
+        except (subprocess.CalledProcessError, subprocess.TimeoutExpired,
+                FileNotFoundError, json.JSONDecodeError):
+            input_resolution = None
+
+        if input_resolution:
+            # Downloads are validated as they finish, then flow straight
+            # into the fused ffmpeg pair builds - no phase boundaries
+            video_pairs = self._run_pipeline(profile_url, max_videos,
+                                             overlay_image, input_video,
+                                             input_resolution)
+        else:
+            # ffprobe unavailable: fall back to the staged pipeline
+            downloaded_videos = self.download_tiktok_videos(profile_url, max_videos)
+
+            if not downloaded_videos:
+                print("No videos were downloaded")
+                return
+
+            print(f"Downloaded {len(downloaded_videos)} videos")
+
+            # _download_one already validated every file and discarded
+            # corrupted ones; no second validation pass needed here
+            processed_videos = []
+            for video_path in downloaded_videos:
+                processed_video = self.process_video(video_path, add_overlay=True)
+                if processed_video:
+                    processed_videos.append(processed_video)
+
+            print(f"Processed {len(processed_videos)} videos")
+
+            video_pairs = self.create_video_pairs(processed_videos, input_video)
+        
+        if video_pairs:
+            print(f"Created {len(video_pairs)} video pairs:")
+            for pair in video_pairs:
+                print(f"  - {pair.name}")
+            print("Process completed successfully!")
+        else:
+            print("Failed to create video pairs")
+        
+        # Clean up temporary files
+        self.cleanup_temp_files()
+
+def main():
+    processor = TikTokVideoProcessor()
+    processor.run()
+
+if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -1,396 +1,496 @@
-#!/usr/bin/env python3
-"""
-Test script to verify all dependencies are installed correctly and check versions
-"""
-
-import subprocess
-import sys
-import pkg_resources
-import requests
-from packaging import version
-import platform
-
-def check_latest_version(package_name):
-    """Check the latest version of a package on PyPI"""
-    try:
-        response = requests.get(f"https://pypi.org/pypi/{package_name}/json", timeout=5)
-        if response.status_code == 200:
-            data = response.json()
-            return data["info"]["version"]
-    except Exception as e:
-        print(f"Could not check latest version for {package_name}: {e}")
-    return None
-
-def get_installed_version(package_name):
-    """Get the installed version of a package"""
-    try:
-        return pkg_resources.get_distribution(package_name).version
-    except pkg_resources.DistributionNotFound:
-        return None
-
-def auto_install_or_update_package(package_name, display_name):
-    """Automatically install or update a Python package"""
-    print(f"🔄 Installing/updating {display_name}...")
-    try:
-        # For MoviePy, use version 2.2.1 for latest compatibility
-        if package_name == 'moviepy':
-            result = subprocess.run([sys.executable, '-m', 'pip', 'uninstall', package_name, '-y'], 
-                                  capture_output=True, text=True, timeout=60)
-            print(f"  Uninstalled old {display_name}")
-            # Install specific version 2.2.1 for latest features
-            result = subprocess.run([sys.executable, '-m', 'pip', 'install', 'moviepy==2.2.1', '--no-cache-dir'], 
-                                  capture_output=True, text=True, timeout=120)
-        else:
-            result = subprocess.run([sys.executable, '-m', 'pip', 'install', '--upgrade', package_name], 
-                                  capture_output=True, text=True, timeout=120)
-        
-        if result.returncode == 0:
-            print(f"✅ {display_name} installed/updated successfully!")
-            return True
-        else:
-            print(f"❌ Failed to install/update {display_name}: {result.stderr}")
-            return False
-    except subprocess.TimeoutExpired:
-        print(f"❌ Install/update timeout for {display_name}")
-        return False
-    except Exception as e:
-        print(f"❌ Error installing/updating {display_name}: {e}")
-        return False
-
-def auto_install_ffmpeg():
-    """Automatically install FFmpeg using Windows package managers or direct download"""
-    print("🔄 Attempting to install FFmpeg...")
-    
-    # Check if running on Windows
-    if platform.system() != "Windows":
-        print("❌ Auto-install for FFmpeg only supported on Windows")
-        return False
-    
-    # Try winget first (Windows 10/11)
-    try:
-        print("  Trying winget...")
-        result = subprocess.run(['winget', 'install', 'Gyan.FFmpeg'], 
-                              capture_output=True, text=True, timeout=300)
-        if result.returncode == 0:
-            print("✅ FFmpeg installed successfully via winget!")
-            return True
-        else:
-            print("  winget install failed")
-    except (FileNotFoundError, subprocess.TimeoutExpired):
-        print("  winget not available")
-    
-    # If winget fails, provide direct download command
-    print("\n❌ Could not auto-install FFmpeg via winget")
-    print("💡 Run this command in PowerShell as Administrator to install FFmpeg:")
-    print("=" * 80)
-    
-    cmd = '''# Download and install FFmpeg
-$ffmpegUrl = "https://www.gyan.dev/ffmpeg/builds/ffmpeg-release-essentials.zip"
-$downloadPath = "$env:TEMP\\ffmpeg.zip"
-$extractPath = "C:\\ffmpeg"
-
-Write-Host "Downloading FFmpeg..." -ForegroundColor Yellow
-Invoke-WebRequest -Uri $ffmpegUrl -OutFile $downloadPath
-
-Write-Host "Extracting FFmpeg..." -ForegroundColor Yellow
-Expand-Archive -Path $downloadPath -DestinationPath $extractPath -Force
-
-# Find the actual ffmpeg folder (it has a version number)
-$ffmpegFolder = Get-ChildItem -Path $extractPath -Directory | Where-Object { $_.Name -like "ffmpeg-*" } | Select-Object -First 1
-$ffmpegBinPath = Join-Path $ffmpegFolder.FullName "bin"
-
-Write-Host "Adding FFmpeg to PATH..." -ForegroundColor Yellow
-$currentPath = [Environment]::GetEnvironmentVariable("PATH", "Machine")
-if ($currentPath -notlike "*$ffmpegBinPath*") {
-    [Environment]::SetEnvironmentVariable("PATH", "$currentPath;$ffmpegBinPath", "Machine")
-    Write-Host "FFmpeg added to system PATH" -ForegroundColor Green
-} else {
-    Write-Host "FFmpeg already in PATH" -ForegroundColor Green
-}
-
-# Clean up
-Remove-Item $downloadPath -Force
-Write-Host "Installation complete! Restart this script to verify." -ForegroundColor Green'''
-    
-    print(cmd)
-    print("=" * 80)
-    print("\nAfter running the command above, restart this script to verify the installation.")
-    return False
-
-def fix_moviepy_installation():
-    """Fix common MoviePy installation issues"""
-    print("🔧 Attempting to fix MoviePy installation...")
-    
-    try:
-        # First, try to uninstall and reinstall MoviePy completely
-        print("  Uninstalling MoviePy...")
-        subprocess.run([sys.executable, '-m', 'pip', 'uninstall', 'moviepy', '-y'], 
-                      capture_output=True, text=True, timeout=60)
-        
-        # Also uninstall imageio-ffmpeg which can cause issues
-        subprocess.run([sys.executable, '-m', 'pip', 'uninstall', 'imageio-ffmpeg', '-y'], 
-                      capture_output=True, text=True, timeout=60)
-        
-        print("  Reinstalling MoviePy with dependencies...")
-        # Use version 2.2.1 for latest features
-        result = subprocess.run([sys.executable, '-m', 'pip', 'install', 'moviepy==2.2.1', 'imageio-ffmpeg', '--no-cache-dir'], 
-                              capture_output=True, text=True, timeout=180)
-        
-        if result.returncode == 0:
-            print("✅ MoviePy reinstalled successfully!")
-            
-            # Test the import immediately with new API
-            try:
-                from moviepy import VideoFileClip
-                print("✅ MoviePy import test passed!")
-                return True
-            except ImportError as e:
-                print(f"❌ MoviePy import still failing: {e}")
-                return False
-        else:
-            print(f"❌ Failed to reinstall MoviePy: {result.stderr}")
-            return False
-            
-    except Exception as e:
-        print(f"❌ Error fixing MoviePy: {e}")
-        return False
-
-def test_ffmpeg():
-    """Test if ffmpeg is installed and accessible, auto-install if missing"""
-    try:
-        result = subprocess.run(['ffmpeg', '-version'], 
-                              capture_output=True, text=True, timeout=10)
-        if result.returncode == 0:
-            # Extract version from output
-            version_line = result.stdout.split('\n')[0]
-            ffmpeg_version = version_line.split()[2] if len(version_line.split()) > 2 else "unknown"
-            print(f"✓ FFmpeg is installed (version: {ffmpeg_version})")
-            return True
-        else:
-            print("❌ FFmpeg is installed but not working properly")
-            return False
-    except (subprocess.TimeoutExpired, FileNotFoundError, subprocess.SubprocessError):
-        print("❌ FFmpeg is not installed or not in PATH")
-        
-        # Attempt auto-installation
-        if auto_install_ffmpeg():
-            # Re-test after installation
-            try:
-                result = subprocess.run(['ffmpeg', '-version'], 
-                                      capture_output=True, text=True, timeout=10)
-                if result.returncode == 0:
-                    version_line = result.stdout.split('\n')[0]
-                    ffmpeg_version = version_line.split()[2] if len(version_line.split()) > 2 else "unknown"
-                    print(f"✓ FFmpeg now working (version: {ffmpeg_version})")
-                    return True
-            except Exception:
-                pass
-        
-        print("  Manual install: https://ffmpeg.org/download.html")
-        return False
-
-def test_versions():
-    """Check versions of critical packages and auto-install/update"""
-    print("\n=== Version Information & Auto-Updates ===")
-    
-    packages_to_check = {
-        'moviepy': 'moviepy',
-        'yt-dlp': 'yt-dlp',
-        'Pillow': 'Pillow',
-        'requests': 'requests',
-        'packaging': 'packaging'
-    }
-    
-    packages_updated = []
-    
-    for display_name, package_name in packages_to_check.items():
-        installed_ver = get_installed_version(package_name)
-        needs_update = False
-        
-        if installed_ver:
-            print(f"✓ {display_name}: {installed_ver} (installed)")
-            
-            # Check latest version
-            latest_ver = check_latest_version(package_name)
-            if latest_ver:
-                if version.parse(installed_ver) < version.parse(latest_ver):
-                    print(f"  ⚠️  Newer version available: {latest_ver}")
-                    # Special handling for MoviePy - ask user before updating
-                    if package_name == 'moviepy':
-                        try:
-                            # Test if current MoviePy works with new API
-                            from moviepy import VideoFileClip
-                            print(f"  ✅ Current MoviePy {installed_ver} is working correctly")
-                            response = input(f"  ❓ Update MoviePy to {latest_ver}? (y/N): ").strip().lower()
-                            if response in ['y', 'yes']:
-                                needs_update = True
-                            else:
-                                print(f"  ℹ️  Keeping current working version {installed_ver}")
-                                needs_update = False
-                        except ImportError:
-                            print(f"  ❌ Current MoviePy {installed_ver} is not working, will update")
-                            needs_update = True
-                    else:
-                        needs_update = True
-                else:
-                    print(f"  ✅ Up to date (latest: {latest_ver})")
-            else:
-                print(f"  ❓ Could not check latest version")
-        else:
-            print(f"❌ {display_name}: Not installed")
-            needs_update = True
-        
-        # Install or update if needed
-        if needs_update:
-            if auto_install_or_update_package(package_name, display_name):
-                packages_updated.append(display_name)
-                # Get new version after update
-                new_ver = get_installed_version(package_name)
-                if new_ver:
-                    print(f"  ✅ Now at version: {new_ver}")
-    
-    if packages_updated:
-        print(f"\n✅ Updated packages: {', '.join(packages_updated)}")
-    else:
-        print(f"\n✅ All packages are up to date!")
-
-def test_imports():
-    """Test if all required packages can be imported"""
-    print("\n=== Testing Imports ===")
-    
-    # Test yt-dlp first
-    try:
-        import yt_dlp
-        print("✓ yt-dlp imported successfully")
-    except ImportError as e:
-        print(f"❌ yt-dlp import error: {e}")
-        return False
-    
-    # Test MoviePy with new 2.2.1 API
-    moviepy_imported = False
-    try:
-        from moviepy import VideoFileClip, ImageClip, CompositeVideoClip, concatenate_videoclips
-        print("✓ moviepy imported successfully")
-        moviepy_imported = True
-    except ImportError as e:
-        print(f"❌ moviepy import error: {e}")
-        print("🔧 Attempting to fix MoviePy installation...")
-        
-        if fix_moviepy_installation():
-            # Try importing again after fix
-            try:
-                from moviepy import VideoFileClip, ImageClip, CompositeVideoClip, concatenate_videoclips
-                print("✓ moviepy imported successfully after fix!")
-                moviepy_imported = True
-            except ImportError as e2:
-                print(f"❌ moviepy still failing after fix: {e2}")
-                moviepy_imported = False
-    
-    if not moviepy_imported:
-        return False
-    
-    # Test other packages
-    try:
-        import requests
-        print("✓ requests imported successfully")
-        
-        from PIL import Image
-        print("✓ Pillow imported successfully")
-        
-        import os
-        from pathlib import Path
-        print("✓ Standard libraries imported successfully")
-        
-        # Test packaging import (needed for version comparison)
-        from packaging import version
-        print("✓ packaging imported successfully")
-        
-        print("\n✅ All dependencies are installed correctly!")
-        return True
-        
-    except ImportError as e:
-        print(f"❌ Import error: {e}")
-        return False
-
-def test_moviepy_functionality():
-    """Test if moviepy can actually process videos"""
-    print("\n=== Testing MoviePy Functionality ===")
-    try:
-        from moviepy import VideoFileClip, ColorClip
-        
-        # Create a test clip
-        test_clip = ColorClip(size=(640, 480), color=(255, 0, 0), duration=1)
-        
-        # Test basic operations
-        test_clip_resized = test_clip.resize(0.5)
-        test_clip_subclip = test_clip.subclip(0, 0.5)
-        
-        # Clean up
-        test_clip.close()
-        test_clip_resized.close()
-        test_clip_subclip.close()
-        
-        print("✓ MoviePy functionality test passed")
-        return True
-        
-    except Exception as e:
-        print(f"❌ MoviePy functionality test failed: {e}")
-        return False
-
-def test_folders():
-    from pathlib import Path
-    
-    folders = ['input', 'overlay', 'output', 'temp']
-    for folder in folders:
-        path = Path(folder)
-        path.mkdir(exist_ok=True)
-        if path.exists():
-            print(f"✓ {folder}/ folder exists")
-        else:
-            print(f"❌ {folder}/ folder could not be created")
-    
-    # Check if example overlay exists
-    overlay_path = Path("overlay/example_overlay.png")
-    if overlay_path.exists():
-        print("✓ Example overlay image found")
-    else:
-        print("ℹ No overlay image found - run create_example_overlay.py to create one")
-    
-    print("\n✅ All folders are ready!")
-
-if __name__ == "__main__":
-    print("Testing TikTok Video Processor setup with auto-install/update...\n")
-    
-    # Test and auto-update versions first
-    test_versions()
-    
-    # Test imports (should work now if packages were installed)
-    imports_ok = test_imports()
-    
-    if imports_ok:
-        # Test FFmpeg (with auto-install)
-        ffmpeg_ok = test_ffmpeg()
-        
-        # Test MoviePy functionality
-        moviepy_ok = test_moviepy_functionality()
-        
-        # Test folders
-        test_folders()
-        
-        # Final summary
-        print("\n" + "="*50)
-        if ffmpeg_ok and moviepy_ok:
-            print("🎉 Setup complete! You can now run main.py")
-        else:
-            print("⚠️  Setup has issues. Please address the problems above.")
-            if not ffmpeg_ok:
-                print("   - FFmpeg installation failed - try manual installation")
-            if not moviepy_ok:
-                print("   - MoviePy functionality test failed")
-    else:
-        print("\n❌ Some dependencies could not be imported after installation.")
-        print("💡 This often happens with MoviePy. Try these solutions:")
-        print("1. Restart your Python environment/IDE")
-        print("2. Run this script again")
-        print("3. Manual reinstall: pip uninstall moviepy && pip install moviepy==2.2.1 --no-cache-dir")
-        print("4. If still failing: pip install moviepy==2.2.1  # Use latest stable version")
+#!/usr/bin/env python3
+"""
+Test script to verify all dependencies are installed correctly and check versions
+"""
+
+import functools
+import importlib
+import os
+import shutil
+import subprocess
+import sys
+from importlib.metadata import version as installed_version, PackageNotFoundError
+import requests
+from requests.adapters import HTTPAdapter, Retry
+from packaging import version
+import platform
+from concurrent.futures import ThreadPoolExecutor
+
+_MOVIEPY = None
+
+def _try_import_moviepy():
+    """Import moviepy once and cache the module; returns None on failure
+
+    MoviePy's import drags in numpy, imageio and friends - often several
+    hundred ms cold - so the various test helpers share one attempt
+    instead of re-importing it each.
+    """
+    global _MOVIEPY
+    if _MOVIEPY is None:
+        try:
+            import moviepy
+            _MOVIEPY = moviepy
+        except ImportError:
+            return None
+    return _MOVIEPY
+
+_PYPI_SESSION = None
+
+def _pypi_session():
+    """The process-wide PyPI session, built lazily on first use"""
+    global _PYPI_SESSION
+    if _PYPI_SESSION is None:
+        _PYPI_SESSION = _build_pypi_session()
+    return _PYPI_SESSION
+
+@functools.lru_cache(maxsize=None)
+def check_latest_version(package_name):
+    """Check the latest version of a package on PyPI; memoized per process
+
+    Queries the Simple API with JSON content negotiation: a few KB of
+    bare version strings instead of the full /pypi/{pkg}/json payload
+    with its complete release history. All lookups share one pooled
+    session, so the TLS handshake and retry policy are paid once.
+    """
+    try:
+        response = _pypi_session().get(
+            f"https://pypi.org/simple/{package_name}/",
+            headers={'Accept': 'application/vnd.pypi.simple.v1+json'},
+            timeout=5)
+        if response.status_code == 200:
+            parsed = []
+            for ver in response.json().get("versions", []):
+                try:
+                    parsed.append(version.parse(ver))
+                except version.InvalidVersion:
+                    continue
+            # Prefer the newest stable release; pre-releases only if
+            # that's all there is
+            stable = [v for v in parsed if not v.is_prerelease]
+            if stable or parsed:
+                return str(max(stable or parsed))
+    except Exception as e:
+        print(f"Could not check latest version for {package_name}: {e}")
+    return None
+
+def _build_pypi_session():
+    """HTTP session for PyPI lookups, disk-cached when requests-cache is available
+
+    PyPI version metadata rarely changes between runs; with requests-cache
+    installed, warm runs answer from a local SQLite cache (kept for an
+    hour, with stale answers allowed if PyPI is unreachable) instead of
+    the network. Without it, a plain pooled session is used.
+    """
+    try:
+        from requests_cache import CachedSession
+        session = CachedSession('.pypi_cache', backend='sqlite',
+                                expire_after=3600, allowable_methods=('GET',),
+                                stale_if_error=True)
+    except ImportError:
+        session = requests.Session()
+    session.mount('https://', HTTPAdapter(
+        pool_connections=4, pool_maxsize=16,
+        max_retries=Retry(total=3, backoff_factor=0.3)))
+    return session
+
+def get_installed_version(package_name):
+    """Get the installed version of a package
+
+    importlib.metadata looks up just the one distribution, unlike
+    pkg_resources which scans every dist-info on sys.path at import.
+    """
+    try:
+        return installed_version(package_name)
+    except PackageNotFoundError:
+        return None
+
+def auto_install_ffmpeg():
+    """Automatically install FFmpeg using Windows package managers or direct download"""
+    print("🔄 Attempting to install FFmpeg...")
+    
+    # Check if running on Windows
+    if platform.system() != "Windows":
+        print("❌ Auto-install for FFmpeg only supported on Windows")
+        return False
+    
+    # Try winget first (Windows 10/11)
+    try:
+        print("  Trying winget...")
+        result = subprocess.run(['winget', 'install', 'Gyan.FFmpeg'],
+                              stdout=subprocess.DEVNULL,
+                              stderr=subprocess.DEVNULL, timeout=300)
+        if result.returncode == 0:
+            print("✅ FFmpeg installed successfully via winget!")
+            return True
+        else:
+            print("  winget install failed")
+    except (FileNotFoundError, subprocess.TimeoutExpired):
+        print("  winget not available")
+    
+    # If winget fails, provide direct download command
+    print("\n❌ Could not auto-install FFmpeg via winget")
+    print("💡 Run this command in PowerShell as Administrator to install FFmpeg:")
+    print("=" * 80)
+    
+    cmd = '''# Download and install FFmpeg
+$ffmpegUrl = "https://www.gyan.dev/ffmpeg/builds/ffmpeg-release-essentials.zip"
+$downloadPath = "$env:TEMP\\ffmpeg.zip"
+$extractPath = "C:\\ffmpeg"
+
+Write-Host "Downloading FFmpeg..." -ForegroundColor Yellow
+Invoke-WebRequest -Uri $ffmpegUrl -OutFile $downloadPath
+
+Write-Host "Extracting FFmpeg..." -ForegroundColor Yellow
+Expand-Archive -Path $downloadPath -DestinationPath $extractPath -Force
+
+# Find the actual ffmpeg folder (it has a version number)
+$ffmpegFolder = Get-ChildItem -Path $extractPath -Directory | Where-Object { $_.Name -like "ffmpeg-*" } | Select-Object -First 1
+$ffmpegBinPath = Join-Path $ffmpegFolder.FullName "bin"
+
+Write-Host "Adding FFmpeg to PATH..." -ForegroundColor Yellow
+$currentPath = [Environment]::GetEnvironmentVariable("PATH", "Machine")
+if ($currentPath -notlike "*$ffmpegBinPath*") {
+    [Environment]::SetEnvironmentVariable("PATH", "$currentPath;$ffmpegBinPath", "Machine")
+    Write-Host "FFmpeg added to system PATH" -ForegroundColor Green
+} else {
+    Write-Host "FFmpeg already in PATH" -ForegroundColor Green
+}
+
+# Clean up
+Remove-Item $downloadPath -Force
+Write-Host "Installation complete! Restart this script to verify." -ForegroundColor Green'''
+    
+    print(cmd)
+    print("=" * 80)
+    print("\nAfter running the command above, restart this script to verify the installation.")
+    return False
+
+def fix_moviepy_installation():
+    """Fix common MoviePy installation issues"""
+    print("🔧 Attempting to fix MoviePy installation...")
+    
+    try:
+        print("  Reinstalling MoviePy with dependencies...")
+        # --force-reinstall replaces the current installs in one pip run
+        # instead of two uninstalls plus an install, each paying pip's
+        # multi-second startup. Use version 2.2.1 for latest features
+        result = subprocess.run([sys.executable, '-m', 'pip', 'install',
+                               '--force-reinstall', '--upgrade',
+                               'moviepy==2.2.1', 'imageio-ffmpeg'],
+                              stdout=subprocess.DEVNULL,
+                              stderr=subprocess.PIPE, text=True, timeout=180)
+        
+        if result.returncode == 0:
+            print("✅ MoviePy reinstalled successfully!")
+
+            # The reinstall changed site-packages under us; drop the
+            # cached module and stale import-system caches before retesting
+            global _MOVIEPY
+            _MOVIEPY = None
+            importlib.invalidate_caches()
+
+            if _try_import_moviepy() is not None:
+                print("✅ MoviePy import test passed!")
+                return True
+            print("❌ MoviePy import still failing")
+            return False
+        else:
+            print(f"❌ Failed to reinstall MoviePy: {result.stderr}")
+            return False
+            
+    except Exception as e:
+        print(f"❌ Error fixing MoviePy: {e}")
+        return False
+
+@functools.lru_cache(maxsize=1)
+def _ffmpeg_version():
+    """Run ffmpeg -version once and return the version string, or None"""
+    ffmpeg_path = shutil.which('ffmpeg')
+    if not ffmpeg_path:
+        return None
+    try:
+        result = subprocess.run([ffmpeg_path, '-version'],
+                              capture_output=True, text=True, timeout=10)
+    except (subprocess.TimeoutExpired, subprocess.SubprocessError):
+        return None
+    if result.returncode != 0:
+        return None
+    # Extract version from output
+    version_line = result.stdout.split('\n')[0]
+    return version_line.split()[2] if len(version_line.split()) > 2 else "unknown"
+
+def test_ffmpeg():
+    """Test if ffmpeg is installed and accessible, auto-install if missing"""
+    # A PATH walk answers the presence question in microseconds; the
+    # subprocess only runs (once, memoized) to fetch the version string
+    if shutil.which('ffmpeg'):
+        ffmpeg_version = _ffmpeg_version()
+        if ffmpeg_version:
+            print(f"✓ FFmpeg is installed (version: {ffmpeg_version})")
+            return True
+        print("❌ FFmpeg is installed but not working properly")
+        return False
+
+    print("❌ FFmpeg is not installed or not in PATH")
+
+    # Attempt auto-installation
+    if auto_install_ffmpeg():
+        # Re-test after installation (the PATH may have changed)
+        _ffmpeg_version.cache_clear()
+        ffmpeg_version = _ffmpeg_version()
+        if ffmpeg_version:
+            print(f"✓ FFmpeg now working (version: {ffmpeg_version})")
+            return True
+
+    print("  Manual install: https://ffmpeg.org/download.html")
+    return False
+
+def test_versions():
+    """Check versions of critical packages and auto-install/update"""
+    print("\n=== Version Information & Auto-Updates ===")
+    
+    packages_to_check = {
+        'moviepy': 'moviepy',
+        'yt-dlp': 'yt-dlp',
+        'Pillow': 'Pillow',
+        'requests': 'requests',
+        'packaging': 'packaging'
+    }
+    
+    packages_updated = []
+    to_install = []
+
+    # The PyPI lookups are independent network round-trips: fan them all
+    # out at once over one pooled session instead of paying N serial RTTs
+    installed_versions = {pkg: get_installed_version(pkg)
+                          for pkg in packages_to_check.values()}
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        latest_versions = dict(zip(
+            packages_to_check.values(),
+            executor.map(check_latest_version, packages_to_check.values())))
+
+    for display_name, package_name in packages_to_check.items():
+        installed_ver = installed_versions[package_name]
+        needs_update = False
+
+        if installed_ver:
+            print(f"✓ {display_name}: {installed_ver} (installed)")
+
+            # Check latest version
+            latest_ver = latest_versions.get(package_name)
+            if latest_ver:
+                if installed_ver == latest_ver:
+                    # Exact match needs no version parsing - and, like any
+                    # up-to-date package, never reaches pip
+                    print(f"  ✅ Up to date (latest: {latest_ver})")
+                elif version.parse(installed_ver) < version.parse(latest_ver):
+                    print(f"  ⚠️  Newer version available: {latest_ver}")
+                    # Special handling for MoviePy - ask user before updating
+                    if package_name == 'moviepy':
+                        # RDS_MOVIEPY_POLICY picks the behavior without
+                        # blocking on input(): 'keep' (default) leaves a
+                        # working install alone, 'update' always upgrades,
+                        # 'auto' prompts when a terminal is attached
+                        policy = os.environ.get('RDS_MOVIEPY_POLICY', 'keep').strip().lower()
+                        # Test if current MoviePy works with new API
+                        if _try_import_moviepy() is not None:
+                            print(f"  ✅ Current MoviePy {installed_ver} is working correctly")
+                            if policy == 'update':
+                                needs_update = True
+                            elif policy == 'auto' and sys.stdin.isatty():
+                                response = input(f"  ❓ Update MoviePy to {latest_ver}? (y/N): ").strip().lower()
+                                needs_update = response in ['y', 'yes']
+                            else:
+                                needs_update = False
+                            if not needs_update:
+                                print(f"  ℹ️  Keeping current working version {installed_ver}")
+                        else:
+                            print(f"  ❌ Current MoviePy {installed_ver} is not working, will update")
+                            needs_update = True
+                    else:
+                        needs_update = True
+                else:
+                    print(f"  ✅ Up to date (latest: {latest_ver})")
+            else:
+                print(f"  ❓ Could not check latest version")
+        else:
+            print(f"❌ {display_name}: Not installed")
+            needs_update = True
+
+        # Collect for one batched install after the loop
+        if needs_update:
+            to_install.append((package_name, display_name))
+
+    # One pip invocation for everything: a single interpreter/resolver
+    # startup instead of one multi-second pip run per package
+    if to_install:
+        specs = ['moviepy==2.2.1' if pkg == 'moviepy' else pkg
+                 for pkg, _ in to_install]
+        names = [disp for _, disp in to_install]
+        print(f"🔄 Installing/updating: {', '.join(names)}...")
+        try:
+            result = subprocess.run(
+                [sys.executable, '-m', 'pip', 'install', '--upgrade'] + specs,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.PIPE, text=True, timeout=300)
+            if result.returncode == 0:
+                print("✅ Packages installed/updated successfully!")
+                packages_updated.extend(names)
+                for pkg, disp in to_install:
+                    new_ver = get_installed_version(pkg)
+                    if new_ver:
+                        print(f"  ✅ {disp} now at version: {new_ver}")
+            else:
+                print(f"❌ Failed to install/update packages: {result.stderr}")
+        except subprocess.TimeoutExpired:
+            print("❌ Install/update timeout")
+        except Exception as e:
+            print(f"❌ Error installing/updating packages: {e}")
+
+    if packages_updated:
+        print(f"\n✅ Updated packages: {', '.join(packages_updated)}")
+    else:
+        print(f"\n✅ All packages are up to date!")
+
+def test_imports():
+    """Test if all required packages can be imported"""
+    print("\n=== Testing Imports ===")
+    
+    # Test yt-dlp first
+    try:
+        import yt_dlp
+        print("✓ yt-dlp imported successfully")
+    except ImportError as e:
+        print(f"❌ yt-dlp import error: {e}")
+        return False
+    
+    # Test MoviePy with new 2.2.1 API (one cached import shared with the
+    # other helpers rather than a fresh package import per test)
+    moviepy_imported = False
+    if _try_import_moviepy() is not None:
+        print("✓ moviepy imported successfully")
+        moviepy_imported = True
+    else:
+        print("❌ moviepy import error")
+        print("🔧 Attempting to fix MoviePy installation...")
+
+        if fix_moviepy_installation():
+            # fix_moviepy_installation already re-imported after the fix
+            print("✓ moviepy imported successfully after fix!")
+            moviepy_imported = True
+        else:
+            print("❌ moviepy still failing after fix")
+            moviepy_imported = False
+    
+    if not moviepy_imported:
+        return False
+    
+    # Test other packages
+    try:
+        import requests
+        print("✓ requests imported successfully")
+        
+        from PIL import Image
+        print("✓ Pillow imported successfully")
+        
+        import os
+        from pathlib import Path
+        print("✓ Standard libraries imported successfully")
+        
+        # Test packaging import (needed for version comparison)
+        from packaging import version
+        print("✓ packaging imported successfully")
+        
+        print("\n✅ All dependencies are installed correctly!")
+        return True
+        
+    except ImportError as e:
+        print(f"❌ Import error: {e}")
+        return False
+
+def test_moviepy_functionality():
+    """Test if moviepy can actually process videos"""
+    print("\n=== Testing MoviePy Functionality ===")
+    try:
+        moviepy_module = _try_import_moviepy()
+        if moviepy_module is None:
+            print("❌ MoviePy functionality test failed: moviepy not importable")
+            return False
+
+        # Create a test clip
+        test_clip = moviepy_module.ColorClip(size=(640, 480), color=(255, 0, 0), duration=1)
+        
+        # Test basic operations
+        test_clip_resized = test_clip.resize(0.5)
+        test_clip_subclip = test_clip.subclip(0, 0.5)
+        
+        # Clean up
+        test_clip.close()
+        test_clip_resized.close()
+        test_clip_subclip.close()
+        
+        print("✓ MoviePy functionality test passed")
+        return True
+        
+    except Exception as e:
+        print(f"❌ MoviePy functionality test failed: {e}")
+        return False
+
+def test_folders():
+    from pathlib import Path
+    
+    folders = ['input', 'overlay', 'output', 'temp']
+    for folder in folders:
+        # mkdir(exist_ok=True) already guarantees the folder exists on
+        # success; no follow-up stat needed
+        try:
+            Path(folder).mkdir(exist_ok=True)
+            print(f"✓ {folder}/ folder exists")
+        except OSError as e:
+            print(f"❌ {folder}/ folder could not be created: {e}")
+    
+    # Check if example overlay exists
+    overlay_path = Path("overlay/example_overlay.png")
+    if overlay_path.exists():
+        print("✓ Example overlay image found")
+    else:
+        print("ℹ No overlay image found - run create_example_overlay.py to create one")
+    
+    print("\n✅ All folders are ready!")
+
+if __name__ == "__main__":
+    print("Testing TikTok Video Processor setup with auto-install/update...\n")
+    
+    # Test and auto-update versions first
+    test_versions()
+    
+    # Test imports (should work now if packages were installed)
+    imports_ok = test_imports()
+    
+    if imports_ok:
+        # Test FFmpeg (with auto-install)
+        ffmpeg_ok = test_ffmpeg()
+        
+        # Test MoviePy functionality
+        moviepy_ok = test_moviepy_functionality()
+        
+        # Test folders
+        test_folders()
+        
+        # Final summary
+        print("\n" + "="*50)
+        if ffmpeg_ok and moviepy_ok:
+            print("🎉 Setup complete! You can now run main.py")
+        else:
+            print("⚠️  Setup has issues. Please address the problems above.")
+            if not ffmpeg_ok:
+                print("   - FFmpeg installation failed - try manual installation")
+            if not moviepy_ok:
+                print("   - MoviePy functionality test failed")
+    else:
+        print("\n❌ Some dependencies could not be imported after installation.")
+        print("💡 This often happens with MoviePy. Try these solutions:")
+        print("1. Restart your Python environment/IDE")
+        print("2. Run this script again")
+        print("3. Manual reinstall: pip uninstall moviepy && pip install moviepy==2.2.1 --no-cache-dir")
+        print("4. If still failing: pip install moviepy==2.2.1  # Use latest stable version")